@@ -1,21 +1,173 @@
 #!/usr/bin/env python3
-import random
-import textwrap
+import heapq
+import json
 from pathlib import Path
 import sys
+from typing import NamedTuple
 
 DEFAULT_DECK = "pandas_cards.txt"
 SEPARATOR = ":::"
+STATE_SUFFIX = ".state.json"
+CACHE_SUFFIX = ".cache"
+CACHE_VERSION = 1  # bump whenever parsing or the Card layout changes
+STRUGGLED_GAP = (3, 7)  # struggled cards return after this many steps
+_DIVIDER = "-" * 80
+_ANSWER_PROMPT = "Your answer (or just Enter to reveal) > "
+_PROMPT = "[Enter = next, g = good, s = struggled, q = quit, h = help] > "
 
 HELP_TEXT = """Commands after seeing the correct answer:
   Enter  - move to next card
   g      - mark as 'got it' (counts as correct)
-  s      - mark as 'struggled' (card will come back later)
+  s      - mark as 'struggled' (card comes back a few cards later)
   q      - quit
   h      - show this help
 """
 
 
+class Card(NamedTuple):
+    front: str
+    back: str
+    topics: tuple[str, ...]  # lowercased, in order of appearance
+
+
+class CardState:
+    """
+    SM-2 style scheduling state for one card.
+
+    `due` is measured in quiz steps (one step per card shown) and keeps
+    counting across sessions, so cards marked 'got it' drift further back
+    and eventually skip whole sessions.
+    """
+    __slots__ = ("interval", "ease", "reps", "due")
+
+    def __init__(self, interval=1, ease=2.5, reps=0, due=0):
+        self.interval = interval
+        self.ease = ease
+        self.reps = reps
+        self.due = due
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def mark_seen(self, step):
+        self.due = step + self.interval
+
+    def mark_good(self, step):
+        self.ease += 0.1
+        self.interval = max(1, round(self.interval * self.ease))
+        self.reps += 1
+        self.due = step + self.interval
+
+    def mark_struggled(self, step, gap=1):
+        self.interval = 1
+        self.ease = max(1.3, self.ease - 0.2)
+        self.due = step + gap
+
+
+def _ask(prompt):
+    """Lean input(): write the prompt, flush once, read a line from stdin."""
+    sys.stdout.write(prompt)
+    sys.stdout.flush()
+    line = sys.stdin.readline()
+    if not line:
+        raise EOFError
+    return line.rstrip("\n")
+
+
+def _parse_deck(text):
+    """Parse deck text into (cards, topic_index, warnings)."""
+    cards = []
+    topic_index = {}
+    warnings = []  # reported together on stderr once parsing is done
+    section_topic = None  # lowercased header like "indexing / selection"
+
+    for line_no, raw in enumerate(text.split("\n"), start=1):
+        stripped = raw.strip()
+
+        if not stripped:
+            continue
+
+        # Section header -> update section_topic, no card here
+        if stripped.startswith("#"):
+            # e.g. "# Indexing / selection" -> "indexing / selection"
+            # Normalised once here rather than for every card in the section
+            section_topic = sys.intern(stripped.lstrip("#").strip().lower())
+            continue
+
+        # Split into front, back, optional extra topic string; a single
+        # part means the line has no SEPARATOR at all
+        parts = raw.split(SEPARATOR)
+        if len(parts) < 2:
+            warnings.append(f"[WARN] Skipping line {line_no}: missing separator '{SEPARATOR}'")
+            continue
+
+        front = parts[0].strip()
+        back = parts[1].strip()
+        topic_str = parts[2].strip() if len(parts) >= 3 else ""
+
+        if not front or not back:
+            warnings.append(f"[WARN] Skipping line {line_no}: empty front/back")
+            continue
+
+        topics = []
+
+        # Section-derived topic
+        if section_topic:
+            topics.append(section_topic)
+
+        # Optional per-card topics (3rd field), comma-separated
+        if topic_str:
+            # Interned so topic set lookups mostly resolve by identity
+            extra_topics = [
+                sys.intern(t.strip().lower())
+                for t in topic_str.split(",")
+                if t.strip()
+            ]
+            topics.extend(extra_topics)
+
+        # Deduplicate topics while preserving order; always a tuple, even
+        # when empty, so readers never need a default
+        topics = tuple(dict.fromkeys(topics))
+
+        for t in topics:
+            topic_index.setdefault(t, []).append(len(cards))
+        cards.append(Card(front, back, topics))
+
+    return cards, topic_index, warnings
+
+
+def _read_cache(cache_path, key):
+    """Return the cached parse for a deck matching `key`, or None."""
+    try:
+        data = json.loads(cache_path.read_text(encoding="utf-8"))
+        if data["key"] != list(key):
+            return None
+        # Re-intern topics so a cache hit keeps the identity lookups of a parse
+        cards = [
+            Card(front, back, tuple(map(sys.intern, topics)))
+            for front, back, topics in data["cards"]
+        ]
+        topic_index = {sys.intern(t): idxs for t, idxs in data["topic_index"].items()}
+        return cards, topic_index, data["warnings"]
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        # Missing, stale-format or unreadable cache: just re-parse
+        return None
+
+
+def _write_cache(cache_path, key, parsed):
+    cards, topic_index, warnings = parsed
+    data = {
+        "key": list(key),
+        "cards": [list(card) for card in cards],
+        "topic_index": topic_index,
+        "warnings": warnings,
+    }
+    try:
+        cache_path.write_text(json.dumps(data), encoding="utf-8")
+    except OSError:
+        pass  # caching is best-effort, e.g. read-only deck directory
+
+
 def load_cards(path: str):
     """
     Load cards from a text file.
@@ -30,103 +182,52 @@ def load_cards(path: str):
       for subsequent cards until the next header.
     - Empty lines are ignored.
 
-    Returns list of dicts:
-        {"front": str, "back": str, "topics": List[str]}
+    Returns (cards, topic_index):
+        cards       - list of Card(front, back, topics) tuples
+        topic_index - {topic: [card indices]} in deck order
     """
     p = Path(path)
     if not p.exists():
         raise FileNotFoundError(f"Deck file not found: {p.resolve()}")
 
-    cards = []
-    current_section = None  # header like "Indexing / selection"
-
-    with p.open("r", encoding="utf-8") as f:
-        for line_no, line in enumerate(f, start=1):
-            raw = line.rstrip("\n")
-            stripped = raw.strip()
-
-            if not stripped:
-                continue
-
-            # Section header -> update current_section, no card here
-            if stripped.startswith("#"):
-                # e.g. "# Indexing / selection" -> "Indexing / selection"
-                current_section = stripped.lstrip("#").strip()
-                continue
-
-            # Non-header line must contain SEPARATOR
-            if SEPARATOR not in raw:
-                print(f"[WARN] Skipping line {line_no}: missing separator '{SEPARATOR}'")
-                continue
-
-            # Split into front, back, optional extra topic string
-            parts = [part.strip() for part in raw.split(SEPARATOR)]
-            if len(parts) < 2:
-                print(f"[WARN] Skipping line {line_no}: not enough fields")
-                continue
-
-            front = parts[0]
-            back = parts[1]
-            topic_str = parts[2] if len(parts) >= 3 else ""
-
-            if not front or not back:
-                print(f"[WARN] Skipping line {line_no}: empty front/back")
-                continue
-
-            topics = []
-
-            # Section-derived topic
-            if current_section:
-                topics.append(current_section.lower())
-
-            # Optional per-card topics (3rd field), comma-separated
-            if topic_str:
-                extra_topics = [
-                    t.strip().lower()
-                    for t in topic_str.split(",")
-                    if t.strip()
-                ]
-                topics.extend(extra_topics)
-
-            # Deduplicate topics while preserving order
-            if topics:
-                seen = set()
-                deduped = []
-                for t in topics:
-                    if t not in seen:
-                        seen.add(t)
-                        deduped.append(t)
-                topics = deduped
-
-            cards.append({"front": front, "back": back, "topics": topics})
+    # Decks rarely change between sessions, so reuse the last parse while
+    # the parser version and the deck's mtime and size are unchanged
+    cache_path = p.with_suffix(p.suffix + CACHE_SUFFIX)
+    st = p.stat()
+    key = (CACHE_VERSION, st.st_mtime_ns, st.st_size)
+    parsed = _read_cache(cache_path, key)
+    if parsed is None:
+        # Decks are small: read in one go instead of iterating the file handle
+        parsed = _parse_deck(p.read_text(encoding="utf-8", errors="strict"))
+        if parsed[0]:
+            _write_cache(cache_path, key, parsed)
+    cards, topic_index, warnings = parsed
+
+    if warnings:
+        sys.stderr.write("\n".join(warnings) + "\n")
 
     if not cards:
         raise ValueError(f"No cards loaded from {p}")
 
-    return cards
+    return cards, topic_index
 
 
-def choose_topic_subset(cards):
+def choose_topic_subset(cards, topic_index):
     """
     Interactively ask user to pick topics (optional).
     Returns a filtered list of cards.
     """
-    topic_set = set()
-    for c in cards:
-        for t in c.get("topics", []):
-            topic_set.add(t)
-
-    if not topic_set:
+    if not topic_index:
         print("No topics found in deck; using all cards.\n")
         return cards
 
-    sorted_topics = sorted(topic_set)
+    # Card counts come straight from the index; no extra pass over cards
     print("Available topics:")
-    for t in sorted_topics:
-        print(f"  - {t}")
+    for t in sorted(topic_index):
+        print(f"  - {t} ({len(topic_index[t])})")
     print()
 
-    raw = input(
+    raw = _ask(
         "Enter topics to drill (comma-separated), or just Enter for all topics: "
     ).strip()
 
@@ -134,15 +235,12 @@ def choose_topic_subset(cards):
         print("Using all cards.\n")
         return cards
 
-    selected = [t.strip().lower() for t in raw.split(",") if t.strip()]
-    selected_set = set(selected)
+    # Card topics are already lowercased at load; only the input needs it
+    selected_set = {sys.intern(t.strip().lower()) for t in raw.split(",") if t.strip()}
     print(f"Selected topics: {', '.join(selected_set)}")
 
-    filtered = [
-        c
-        for c in cards
-        if c.get("topics") and any(t in selected_set for t in c["topics"])
-    ]
+    matched = set().union(*(topic_index.get(t, ()) for t in selected_set))
+    filtered = [cards[i] for i in sorted(matched)]
 
     if not filtered:
         print("No cards matched those topics. Using all cards instead.\n")
@@ -152,77 +250,179 @@ def choose_topic_subset(cards):
     return filtered
 
 
+def _indent(text):
+    return "    " + text.replace("\n", "\n    ")
+
+
 def print_question(card):
-    topics = card.get("topics") or []
     header = "Q:"
-    if topics:
-        header += f" [topics: {', '.join(topics)}]"
-    print("-" * 80)
-    print(header, card["front"])
-    print("-" * 80)
+    if card.topics:
+        header += f" [topics: {', '.join(card.topics)}]"
+    sys.stdout.write("\n".join([_DIVIDER, f"{header} {card.front}", _DIVIDER, ""]))
 
 
 def print_answer(user_answer, card):
-    print("-" * 80)
+    # Build the whole block first so it goes out in a single write
+    lines = [_DIVIDER]
     if user_answer.strip():
-        print("Your answer:")
-        print(textwrap.indent(user_answer, "    "))
-        print()
-    print("Correct answer:")
-    print(textwrap.indent(card["back"], "    "))
-    print("-" * 80)
+        lines += ["Your answer:", _indent(user_answer), ""]
+    lines += ["Correct answer:", _indent(card.back), _DIVIDER, ""]
+    sys.stdout.write("\n".join(lines))
 
 
-def run_quiz(cards):
-    indices = list(range(len(cards)))
-    random.shuffle(indices)
+def _card_key(card):
+    # Neither side can contain SEPARATOR, so this is unique per (front, back)
+    return f"{card.front} {SEPARATOR} {card.back}"
+
+
+def load_state(path):
+    """
+    Load scheduling state saved by a previous session.
+
+    Returns (step, {card key: CardState}); a missing or unreadable file
+    just means starting fresh.
+    """
+    p = Path(path)
+    if not p.exists():
+        return 0, {}
+    try:
+        data = json.loads(p.read_text(encoding="utf-8"))
+        states = {key: CardState(**st) for key, st in data["cards"].items()}
+        return int(data["step"]), states
+    except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+        print(f"[WARN] Ignoring unreadable state file {p}: {e}", file=sys.stderr)
+        return 0, {}
+
+
+def save_state(path, step, states):
+    data = {
+        "step": step,
+        "cards": {key: st.as_dict() for key, st in states.items()},
+    }
+    try:
+        Path(path).write_text(json.dumps(data, indent=1), encoding="utf-8")
+    except OSError as e:
+        print(f"[WARN] Could not save state file {path}: {e}", file=sys.stderr)
+
+
+# Self-mark command handlers, called with the card's state, the current step
+# and run_quiz's random module. Each returns (correct, seen, requeue, quit)
+# increments for the card just answered, or None to keep prompting.
+def _cmd_next(state, step, rng):
+    state.mark_seen(step)
+    return 0, 1, False, False
+
+
+def _cmd_good(state, step, rng):
+    state.mark_good(step)
+    return 1, 1, False, False
+
+
+def _cmd_struggled(state, step, rng):
+    # reschedule this card to come back soon
+    state.mark_struggled(step, rng.randint(*STRUGGLED_GAP))
+    return 0, 1, True, False
+
+
+def _cmd_quit(state, step, rng):
+    return 0, 0, False, True
+
+
+def _cmd_help(state, step, rng):
+    print(HELP_TEXT)
+    return None
+
+
+_COMMANDS = {
+    "": _cmd_next,
+    "g": _cmd_good,
+    "s": _cmd_struggled,
+    "q": _cmd_quit,
+    "h": _cmd_help,
+}
+
+
+def run_quiz(cards, state_path=None):
+    import random  # only needed once a quiz actually starts
+
+    step, states = load_state(state_path) if state_path else (0, {})
+
+    # Unseen cards are queued in random order behind the current step;
+    # the shuffled position also breaks ties between equally-due cards.
+    # Exact duplicate cards share one state and are queued only once.
+    indices = random.sample(range(len(cards)), len(cards))
+    heap = []
+    queued = set()
+    for pos, idx in enumerate(indices):
+        key = _card_key(cards[idx])
+        if key in queued:
+            continue
+        queued.add(key)
+        if key not in states:
+            # due on the step at which its place in the queue comes up
+            states[key] = CardState(due=step + len(heap) + 1)
+        heap.append((states[key].due, pos, idx))
+    heapq.heapify(heap)
+    order = len(heap)  # tie-breaker for re-queued cards
+
+    # A session covers one step per queued card. Cards due after that are
+    # left for a later session, which is what spaces out well-known cards.
+    horizon = step + len(heap)
 
     correct = 0
     total_seen = 0
     quitting = False
 
     print("pandas flashcards – CLI trainer")
-    print(f"Loaded {len(cards)} cards in this session.")
+    due_now = sum(1 for due, _, _ in heap if due <= horizon)
+    banner = f"Queued {due_now} cards for this session"
+    if due_now < len(heap):
+        banner += f" ({len(heap) - due_now} more not due yet)"
+    print(banner + ".")
     print(HELP_TEXT)
 
-    i = 0
-    while i < len(indices) and not quitting:
-        idx = indices[i]
-        card = cards[idx]
-
-        # 1. Show question
-        print_question(card)
-
-        # 2. User types answer (one line)
-        user_answer = input("Your answer (or just Enter to reveal) > ")
-
-        # 3. Show model answer
-        print_answer(user_answer, card)
-
-        # 4. Self-mark loop
-        while True:
-            cmd = input("[Enter = next, g = good, s = struggled, q = quit, h = help] > ").strip().lower()
-            if cmd == "":
-                total_seen += 1
-                break
-            elif cmd == "g":
-                correct += 1
-                total_seen += 1
-                break
-            elif cmd == "s":
-                total_seen += 1
-                # push this card to the end of the queue
-                indices.append(idx)
-                break
-            elif cmd == "q":
-                quitting = True
+    # Save progress even if the session ends on EOF or Ctrl-C
+    try:
+        while heap and heap[0][0] <= horizon and not quitting:
+            _, _, idx = heapq.heappop(heap)
+            card = cards[idx]
+            state = states[_card_key(card)]
+            step += 1
+
+            # 1. Show question
+            print_question(card)
+
+            # 2. User types answer (one line)
+            user_answer = _ask(_ANSWER_PROMPT)
+
+            # 3. Show model answer
+            print_answer(user_answer, card)
+
+            # 4. Self-mark loop
+            while True:
+                handler = _COMMANDS.get(_ask(_PROMPT).strip().lower())
+                if handler is None:
+                    print("Unknown command. Use Enter/g/s/q/h.")
+                    continue
+                result = handler(state, step, random)
+                if result is None:
+                    continue
+                got, seen, requeue, quitting = result
+                correct += got
+                total_seen += seen
+                if requeue:
+                    # struggled cards always come back within this session
+                    horizon = max(horizon, state.due)
+                    heapq.heappush(heap, (state.due, order, idx))
+                    order += 1
                 break
-            elif cmd == "h":
-                print(HELP_TEXT)
-            else:
-                print("Unknown command. Use Enter/g/s/q/h.")
 
-        i += 1
+        if not quitting:
+            # The session used up its window even if some cards weren't due
+            step = max(step, horizon)
+    finally:
+        if state_path:
+            save_state(state_path, step, states)
 
     print("\nSession summary:")
     print(f"  Cards seen: {total_seen}")
@@ -230,6 +430,8 @@ def run_quiz(cards):
     if total_seen:
         pct = 100.0 * correct / total_seen
         print(f"  Accuracy: {pct:.1f}%")
+    if heap and not quitting:
+        print(f"  Not due yet: {len(heap)} (they come back in a later session)")
     print("Edit the deck file to add/remove cards or topics and rerun to keep drilling.")
 
 
@@ -240,15 +442,15 @@ def main():
         deck_path = DEFAULT_DECK
 
     try:
-        cards = load_cards(deck_path)
+        cards, topic_index = load_cards(deck_path)
     except Exception as e:
         print(f"Error loading deck: {e}")
         sys.exit(1)
 
     # Topic selection using section headers (and optional per-card tags)
-    cards = choose_topic_subset(cards)
+    cards = choose_topic_subset(cards, topic_index)
 
-    run_quiz(cards)
+    run_quiz(cards, deck_path + STATE_SUFFIX)
 
 
 if __name__ == "__main__":